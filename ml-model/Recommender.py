@@ -3,8 +3,10 @@ import os
 from datetime import datetime
 import sys
 import json
+import traceback
 import numpy as np
 from typing import List, Dict
+from menu_schema import to_menu_frame
 
 #############################
 # Configuration
@@ -32,6 +34,9 @@ WEIGHTS = {
     'calories': 0.2          # Calorie balance
 }
 
+# Per-item columns summed per dining hall for scoring and insights
+AGGREGATE_COLUMNS = ['calories', 'protein', 'total_carbohydrate', 'total_fat', 'meal_health']
+
 # Target values for optimal nutrition
 TARGETS = {
     'calories_per_meal': 600,    # Target calories per meal
@@ -158,8 +163,15 @@ def recommend_dining_hall(dining_df: pd.DataFrame) -> List[Dict]:
     """
     Generate dining hall recommendations with insights
     """
+    return recommend_from_aggregates(aggregate_dining_halls(dining_df))
+
+def recommend_from_aggregates(aggregates: pd.DataFrame) -> List[Dict]:
+    """
+    Generate dining hall recommendations with insights from per-hall aggregates
+    (see aggregate_dining_halls)
+    """
     # Compute scores for each dining hall
-    scores = compute_dining_scores(dining_df)
+    scores = score_hall_aggregates(aggregates)
     
     # Log raw scores before sorting
     print("\nRaw dining hall scores:", file=sys.stderr)
@@ -174,7 +186,7 @@ def recommend_dining_hall(dining_df: pd.DataFrame) -> List[Dict]:
     sys.stderr.flush()
     
     # Sort by final score
-    ranked_halls = scores.sort_values('final_score', ascending=False)
+    ranked_halls = scores.sort_values('final_score', ascending=False, kind='stable')
     
     # Log ranking order
     print("\nFinal Rankings:", file=sys.stderr)
@@ -186,7 +198,7 @@ def recommend_dining_hall(dining_df: pd.DataFrame) -> List[Dict]:
     # Generate insights for each dining hall
     results = []
     for _, row in ranked_halls.iterrows():
-        dining_hall = row['dining_hall']
+        dining_hall = str(row['dining_hall'])
         
         # Replace NaN with 0 for all scores
         final_score = float(row['final_score']) if not pd.isna(row['final_score']) else 0.0
@@ -204,35 +216,55 @@ def recommend_dining_hall(dining_df: pd.DataFrame) -> List[Dict]:
                 'variety': round(variety_score, 3),
                 'calorie_balance': round(calorie_score, 3)
             },
-            'insights': get_dining_insights(dining_hall, dining_df)
+            'insights': get_hall_insights(dining_hall, aggregates)
         }
         results.append(result)
     
     return results
 
+def aggregate_dining_halls(dining_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute per-hall menu size and nutrient sums.
+    Returns a DataFrame indexed by dining_hall (sorted) with columns menu_size and
+    the float64 sums of AGGREGATE_COLUMNS. Sums (rather than means) can be updated
+    incrementally when items are added to or removed from a hall.
+    """
+    values = dining_df[AGGREGATE_COLUMNS].astype(np.float64)
+    values['dining_hall'] = dining_df['dining_hall']
+    grouped = values.groupby('dining_hall', observed=True)
+    aggregates = grouped[AGGREGATE_COLUMNS].sum()
+    aggregates.insert(0, 'menu_size', grouped.size())
+    aggregates.index = aggregates.index.astype(str)
+    return aggregates.sort_index()
+
 def compute_dining_scores(dining_df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute recommendation scores for each dining hall
     """
-    scores = pd.DataFrame()
-    scores['dining_hall'] = dining_df['dining_hall'].unique()
+    return score_hall_aggregates(aggregate_dining_halls(dining_df))
+
+def score_hall_aggregates(aggregates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute recommendation scores for each dining hall from per-hall aggregates
+    """
+    menu_counts = aggregates['menu_size']
+    means = aggregates[AGGREGATE_COLUMNS].div(menu_counts, axis=0)
+    
+    scores = pd.DataFrame(index=aggregates.index)
     
     # Calculate health score (already normalized)
-    scores['health_score'] = dining_df.groupby('dining_hall')['meal_health'].mean().fillna(0)
+    scores['health_score'] = means['meal_health'].fillna(0)
     
     # Calculate protein score (normalize based on target)
-    protein_means = dining_df.groupby('dining_hall')['protein'].mean()
-    scores['protein_score'] = (protein_means / TARGETS['protein_per_meal']).fillna(0)
+    scores['protein_score'] = (means['protein'] / TARGETS['protein_per_meal']).fillna(0)
     scores['protein_score'] = scores['protein_score'].clip(0, 1)  # Normalize to 0-1
     
     # Calculate variety score
-    menu_counts = dining_df.groupby('dining_hall').size()
     scores['variety_score'] = (menu_counts / TARGETS['min_menu_items']).fillna(0)
     scores['variety_score'] = scores['variety_score'].clip(0, 1)  # Normalize to 0-1
     
     # Calculate calorie balance score
-    calorie_means = dining_df.groupby('dining_hall')['calories'].mean()
-    calorie_diff = abs(calorie_means - TARGETS['calories_per_meal'])
+    calorie_diff = abs(means['calories'] - TARGETS['calories_per_meal'])
     scores['calorie_score'] = (1 - (calorie_diff / TARGETS['calories_per_meal'])).fillna(0)
     scores['calorie_score'] = scores['calorie_score'].clip(0, 1)  # Normalize to 0-1
     
@@ -244,26 +276,34 @@ def compute_dining_scores(dining_df: pd.DataFrame) -> pd.DataFrame:
         WEIGHTS['calories'] * scores['calorie_score']
     ).fillna(0)  # Fill NaN with 0
     
-    return scores
+    return scores.reset_index()
 
 def get_dining_insights(dining_hall: str, dining_df: pd.DataFrame) -> Dict:
     """
     Generate insights for a specific dining hall
     """
     hall_data = dining_df[dining_df['dining_hall'] == dining_hall]
+    return get_hall_insights(dining_hall, aggregate_dining_halls(hall_data))
+
+def get_hall_insights(dining_hall: str, aggregates: pd.DataFrame) -> Dict:
+    """
+    Generate insights for a specific dining hall from per-hall aggregates
+    """
+    hall = aggregates.loc[dining_hall]
+    menu_size = int(hall['menu_size'])
     
     # Calculate average macros
     avg_macros = {
-        'calories': round(hall_data['calories'].mean(), 1),
-        'protein': round(hall_data['protein'].mean(), 1),
-        'carbs': round(hall_data['total_carbohydrate'].mean(), 1),
-        'fat': round(hall_data['total_fat'].mean(), 1)
+        'calories': round(float(hall['calories']) / menu_size, 1),
+        'protein': round(float(hall['protein']) / menu_size, 1),
+        'carbs': round(float(hall['total_carbohydrate']) / menu_size, 1),
+        'fat': round(float(hall['total_fat']) / menu_size, 1)
     }
     
     return {
         'dining_hall': dining_hall,
-        'menu_size': len(hall_data),
-        'avg_health_score': round(hall_data['meal_health'].mean(), 3),
+        'menu_size': menu_size,
+        'avg_health_score': round(float(hall['meal_health']) / menu_size, 3),
         'avg_macros': avg_macros
     }
 
@@ -278,7 +318,8 @@ if __name__ == "__main__":
         # Read and parse input data
         input_data = sys.stdin.read()
         parsed_data = json.loads(input_data)
-        dining_df = pd.DataFrame(parsed_data)
+        # Accepts per-item menu records as well as per-hall rows (see DINING_HALLS_CSV)
+        dining_df = to_menu_frame(parsed_data, required=['dining_hall'])
         
         print("\nGenerating recommendations for dining halls:", file=sys.stderr)
         for hall in dining_df['dining_hall'].unique():
@@ -0,0 +1,275 @@
+import pandas as pd
+import numpy as np
+import time
+import sys
+import tracemalloc
+import io
+import json
+from pathlib import Path
+from contextlib import redirect_stderr
+from typing import List, Dict
+
+from meals import compute_meal_health, compute_meal_health_scores, analyze_meals, NUTRITIONIX_DB
+from Recommender import compute_dining_scores, recommend_dining_hall, recommend_from_aggregates, WEIGHTS, TARGETS
+from menu_schema import to_menu_frame, memory_per_item, nutrient_values, NUTRIENT_COLUMNS
+from menu_snapshot import refresh_menu, MEAL_PERIOD_KEY
+from nutrient_estimator import fit_nutrient_estimator, estimate_nutrients, DEFAULT_NUTRIENTS
+
+#############################
+# Configuration
+#############################
+NUM_HALLS = 12
+NUM_DISHES = 400
+NUM_ITEMS = 20000
+REPEATS = 5
+SEED = 0
+
+# Snapshot benchmark: scraped menu size, meal periods and share of dishes in the DB
+SNAPSHOT_ITEMS = 3000
+MEAL_PERIODS = ["breakfast", "lunch", "dinner"]
+KNOWN_DISH_FRACTION = 0.9
+
+# Estimator benchmark: held-out share of the nutrition DB and batch size for throughput
+HOLDOUT_FRACTION = 0.2
+THROUGHPUT_BATCH = 10000
+
+#############################
+# Helpers
+#############################
+def make_menu(num_items: int = NUM_ITEMS, seed: int = SEED) -> List[Dict]:
+    """Generate synthetic enriched menu records in the meals.analyze_meals output format"""
+    rng = np.random.default_rng(seed)
+    halls = [f"Dining Hall {i}" for i in range(NUM_HALLS)]
+    dishes = [f"Grilled Dish Number {i} with Seasonal Vegetables" for i in range(NUM_DISHES)]
+    dish_nutrients = rng.uniform([50, 0, 0, 0], [1200, 60, 150, 70], size=(NUM_DISHES, 4))
+    hall_idx = rng.integers(0, NUM_HALLS, num_items)
+    dish_idx = rng.integers(0, NUM_DISHES, num_items)
+    records = []
+    for h, d in zip(hall_idx, dish_idx):
+        record = {'dining_hall': halls[h], 'meal_name': dishes[d]}
+        record.update(zip(NUTRIENT_COLUMNS, dish_nutrients[d].tolist()))
+        records.append(record)
+    return records
+
+def make_scrape(num_items: int = SNAPSHOT_ITEMS, seed: int = SEED):
+    """Generate synthetic scraped menu items plus a nutrition DB covering most dishes"""
+    rng = np.random.default_rng(seed)
+    halls = [f"Dining Hall {i}" for i in range(NUM_HALLS)]
+    dishes = [f"{rng.choice(['Grilled', 'Roasted', 'Baked', 'Steamed'])} {word} {i}"
+              for i, word in enumerate(rng.choice(['Chicken', 'Tofu', 'Salmon', 'Pasta', 'Salad'], NUM_DISHES))]
+    dish_nutrients = rng.uniform([50, 0, 0, 0], [1200, 60, 150, 70], size=(NUM_DISHES, 4))
+    nutrition_db = {
+        dishes[i]: dict(zip(NUTRIENT_COLUMNS, dish_nutrients[i].tolist()))
+        for i in range(int(NUM_DISHES * KNOWN_DISH_FRACTION))
+    }
+    items = [
+        {'dining_hall': halls[h], MEAL_PERIOD_KEY: MEAL_PERIODS[p], 'meal_name': dishes[d]}
+        for h, p, d in zip(rng.integers(0, NUM_HALLS, num_items),
+                           rng.integers(0, len(MEAL_PERIODS), num_items),
+                           rng.integers(0, NUM_DISHES, num_items))
+    ]
+    return items, nutrition_db
+
+def make_nutrition_db(seed: int = SEED) -> Dict:
+    """
+    Synthetic nutrition DB whose macros are a sum of per-word values. This is the
+    exact assumption the name-token estimator relies on, so accuracy measured on
+    it is an upper bound, not an estimate of real-world accuracy.
+    """
+    rng = np.random.default_rng(seed)
+    parts = {
+        'method': ['Grilled', 'Fried', 'Roasted', 'Steamed', 'Baked', 'Braised'],
+        'main': ['Chicken', 'Beef', 'Tofu', 'Salmon', 'Pork', 'Shrimp', 'Lentil', 'Turkey'],
+        'side': ['Rice', 'Fries', 'Salad', 'Noodles', 'Quinoa', 'Mashed Potatoes', 'Broccoli']
+    }
+    macros = {word: rng.uniform([20, 0, 0, 0], [400, 30, 60, 25])
+              for words in parts.values() for word in words}
+    db = {}
+    for method in parts['method']:
+        for main in parts['main']:
+            for side in parts['side']:
+                name = f"{method} {main} with {side}"
+                values = (macros[method] * 0.3 + macros[main] + macros[side]) * rng.normal(1, 0.05)
+                db[name] = dict(zip(NUTRIENT_COLUMNS, values.round(1).tolist()))
+    return db
+
+def best_time(fn, repeats: int = REPEATS) -> float:
+    """Best wall-clock time of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def legacy_compute_dining_scores(dining_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recommender.compute_dining_scores as it was before the typed menu schema,
+    copied verbatim for timing. Note it assigns hall-indexed Series to a
+    RangeIndex frame, so every score comes out as 0.
+    """
+    scores = pd.DataFrame()
+    scores['dining_hall'] = dining_df['dining_hall'].unique()
+    
+    scores['health_score'] = dining_df.groupby('dining_hall')['meal_health'].mean().fillna(0)
+    
+    protein_means = dining_df.groupby('dining_hall')['protein'].mean()
+    scores['protein_score'] = (protein_means / TARGETS['protein_per_meal']).fillna(0)
+    scores['protein_score'] = scores['protein_score'].clip(0, 1)
+    
+    menu_counts = dining_df.groupby('dining_hall').size()
+    scores['variety_score'] = (menu_counts / TARGETS['min_menu_items']).fillna(0)
+    scores['variety_score'] = scores['variety_score'].clip(0, 1)
+    
+    calorie_means = dining_df.groupby('dining_hall')['calories'].mean()
+    calorie_diff = abs(calorie_means - TARGETS['calories_per_meal'])
+    scores['calorie_score'] = (1 - (calorie_diff / TARGETS['calories_per_meal'])).fillna(0)
+    scores['calorie_score'] = scores['calorie_score'].clip(0, 1)
+    
+    scores['final_score'] = (
+        WEIGHTS['meal_health'] * scores['health_score'] +
+        WEIGHTS['protein'] * scores['protein_score'] +
+        WEIGHTS['variety'] * scores['variety_score'] +
+        WEIGHTS['calories'] * scores['calorie_score']
+    ).fillna(0)
+    
+    return scores
+
+#############################
+# Benchmarks
+#############################
+def bench_menu_schema(records: List[Dict]) -> Dict:
+    """
+    Compare the baseline pipeline (object/float64 frame, row-wise health scoring,
+    baseline compute_dining_scores) with the compact schema and current scoring
+    """
+    legacy = pd.DataFrame(records).astype({'dining_hall': object, 'meal_name': object})
+    legacy['meal_health'] = legacy.apply(compute_meal_health, axis=1)
+    compact = to_menu_frame(records)
+    compact['meal_health'] = compute_meal_health_scores(compact)
+
+    def score_legacy():
+        legacy.apply(compute_meal_health, axis=1)
+        legacy_compute_dining_scores(legacy)
+
+    def score_compact():
+        compute_meal_health_scores(compact)
+        compute_dining_scores(compact)
+
+    return {
+        'items': len(records),
+        'legacy_bytes_per_item': memory_per_item(legacy),
+        'compact_bytes_per_item': memory_per_item(compact),
+        'legacy_score_seconds': best_time(score_legacy),
+        'compact_score_seconds': best_time(score_compact),
+    }
+
+def bench_snapshot_refresh(items: List[Dict], nutrition_db: Dict) -> Dict:
+    """Compare full recompute with incremental snapshot refreshes"""
+    def full_recompute(menu_items):
+        results = analyze_meals(menu_items, nutrition_db)
+        return recommend_dining_hall(to_menu_frame(results['dining_averages']))
+
+    # One meal period of one hall swaps a few dishes, including unseen ones
+    changed_items = [dict(item) for item in items]
+    target = (changed_items[0]['dining_hall'], changed_items[0][MEAL_PERIOD_KEY])
+    swapped = [item for item in changed_items if (item['dining_hall'], item[MEAL_PERIOD_KEY]) == target]
+    for i, item in enumerate(swapped[:5]):
+        item['meal_name'] = f"Chef Special {i}"
+
+    snapshot, _ = refresh_menu(items, nutrition_db)
+    result = {
+        'full_seconds': best_time(lambda: full_recompute(items), repeats=1),
+        'cold_seconds': best_time(lambda: refresh_menu(items, nutrition_db), repeats=1),
+        'unchanged_seconds': best_time(lambda: refresh_menu(items, nutrition_db, snapshot)),
+        'one_group_seconds': best_time(lambda: refresh_menu(changed_items, nutrition_db, snapshot)),
+    }
+
+    # Incremental results must match a full recompute
+    matches = True
+    for menu_items in (items, changed_items):
+        refreshed, _ = refresh_menu(menu_items, nutrition_db, snapshot)
+        matches &= recommend_from_aggregates(refreshed['hall_aggregates']) == full_recompute(menu_items)
+    result['matches_full_recompute'] = matches
+    return result
+
+def bench_nutrient_estimator(nutrition_db: Dict, seed: int = SEED) -> Dict:
+    """
+    Accuracy on a held-out split of the nutrition DB and batch inference throughput.
+    Entries the estimator filled in earlier are left out of both halves so it is
+    never scored against its own predictions.
+    """
+    rng = np.random.default_rng(seed)
+    names = [name for name, entry in nutrition_db.items() if not entry.get("estimated")]
+    rng.shuffle(names)
+    num_test = max(1, int(len(names) * HOLDOUT_FRACTION))
+    test, train = names[:num_test], names[num_test:]
+    start = time.perf_counter()
+    model = fit_nutrient_estimator({name: nutrition_db[name] for name in train})
+    fit_seconds = time.perf_counter() - start
+
+    actual = np.array([nutrient_values(nutrition_db[name]) for name in test])
+    predicted, confidence = estimate_nutrients(model, test)
+    default = np.array([DEFAULT_NUTRIENTS[col] for col in NUTRIENT_COLUMNS])
+
+    batch = (test * (THROUGHPUT_BATCH // len(test) + 1))[:THROUGHPUT_BATCH]
+    seconds = best_time(lambda: estimate_nutrients(model, batch), repeats=3)
+    tracemalloc.start()
+    estimate_nutrients(model, batch)
+    query_peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'train': len(train),
+        'fit_seconds': fit_seconds,
+        'model_bytes': sum(value.nbytes for value in model.values()),
+        'test': len(test),
+        'estimator_mae': np.abs(predicted - actual).mean(axis=0),
+        'default_mae': np.abs(default - actual).mean(axis=0),
+        'mean_mae': np.abs(model['fallback'] - actual).mean(axis=0),
+        'mean_confidence': float(confidence.mean()),
+        'items_per_second': len(batch) / seconds,
+        'query_peak_bytes': query_peak_bytes,
+    }
+
+if __name__ == "__main__":
+    records = make_menu()
+    result = bench_menu_schema(records)
+    print(f"Menu schema ({result['items']} items):")
+    print("  (scoring = per-item health scoring + per-hall scores; most of the legacy time is")
+    print("   the row-wise apply(compute_meal_health), not the per-hall aggregation)")
+    print(f"  legacy:  {result['legacy_bytes_per_item']:.1f} bytes/item, "
+          f"scoring {result['legacy_score_seconds'] * 1000:.1f} ms")
+    print(f"  compact: {result['compact_bytes_per_item']:.1f} bytes/item, "
+          f"scoring {result['compact_score_seconds'] * 1000:.1f} ms")
+    print(f"  memory saved: {1 - result['compact_bytes_per_item'] / result['legacy_bytes_per_item']:.1%}, "
+          f"scoring speedup: {result['legacy_score_seconds'] / result['compact_score_seconds']:.1f}x")
+
+    items, nutrition_db = make_scrape()
+    with redirect_stderr(io.StringIO()):
+        result = bench_snapshot_refresh(items, nutrition_db)
+    print(f"Snapshot refresh ({len(items)} scraped items):")
+    print(f"  full recompute:         {result['full_seconds'] * 1000:.1f} ms")
+    print(f"  cold snapshot:          {result['cold_seconds'] * 1000:.1f} ms")
+    print(f"  unchanged menu:         {result['unchanged_seconds'] * 1000:.2f} ms")
+    print(f"  one hall/period change: {result['one_group_seconds'] * 1000:.2f} ms")
+    print(f"  matches full recompute: {result['matches_full_recompute']}")
+
+    if Path(NUTRITIONIX_DB).exists():
+        with open(NUTRITIONIX_DB) as f:
+            nutrition_db, source = json.load(f)['meals'], NUTRITIONIX_DB
+    else:
+        nutrition_db, source = make_nutrition_db(), "SYNTHETIC DB"
+    result = bench_nutrient_estimator(nutrition_db)
+    print(f"Nutrient estimator ({source}, {result['train']} train / {result['test']} held out):")
+    if source == "SYNTHETIC DB":
+        print("  WARNING: macros in the synthetic DB are additive in the name words (the estimator's")
+        print("  own assumption); these MAE figures do not indicate real-world accuracy. Put a real")
+        print(f"  {NUTRITIONIX_DB} next to this script to measure on real data.")
+    print(f"  MAE per nutrient ({', '.join(NUTRIENT_COLUMNS)}):")
+    for label, key in (("estimator", 'estimator_mae'), ("fixed default", 'default_mae'), ("train mean", 'mean_mae')):
+        print(f"    {label:14s} " + "  ".join(f"{value:7.1f}" for value in result[key]))
+    print(f"  fit: {result['fit_seconds'] * 1000:.1f} ms, model size: {result['model_bytes'] / 1e6:.2f} MB")
+    print(f"  mean confidence: {result['mean_confidence']:.3f}")
+    print(f"  throughput: {result['items_per_second']:,.0f} items/s (batch of {THROUGHPUT_BATCH}), "
+          f"query peak memory: {result['query_peak_bytes'] / 1e6:.1f} MB")
+    sys.exit(0)
@@ -1,11 +1,15 @@
 import pandas as pd
 import requests
 import time
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import sys
 import json
+import hashlib
+import numpy as np
 from fuzzywuzzy import fuzz
 from pathlib import Path
+from menu_schema import to_menu_frame, menu_records, nutrient_values, nutrient_confidence, NUTRIENT_COLUMNS, CONFIDENCE_COLUMN
+from nutrient_estimator import fit_nutrient_estimator, estimate_nutrients
 
 #############################
 # Configuration
@@ -24,6 +28,9 @@ REFERENCE_FAT = 70.0
 NUTRITIONIX_DB = "nutritionix_db.json"
 FUZZY_MATCH_THRESHOLD = 85
 
+# Fallback estimator fitted on the nutrition database, reused while the DB is unchanged
+_estimator_cache = {"db_version": None, "model": None}
+
 def get_nutrients_from_nutritionix(query: str) -> Dict:
     """Get nutritional information from Nutritionix API"""
     url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
@@ -58,6 +65,26 @@ def get_nutrients_from_nutritionix(query: str) -> Dict:
     
     return None
 
+def is_menu_item(item: Dict) -> bool:
+    """Check whether a scraped item is an actual dish (not a closed/empty placeholder)"""
+    return bool(item.get('meal_name') and  # Use get() to avoid KeyError
+                item['meal_name'] != "Closed" and 
+                item['meal_name'] != "No items available" and 
+                item.get('dining_hall') is not None)
+
+def nutrition_db_fingerprint(nutrition_db: Dict) -> str:
+    """Fingerprint of the nutrition database contents, used to detect changes between runs"""
+    return hashlib.blake2b(json.dumps(nutrition_db, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+def get_nutrient_estimator(nutrition_db: Dict, db_version: str = None) -> Dict:
+    """Fitted fallback estimator for a nutrition database, refitted only when the DB changes"""
+    if db_version is None:
+        db_version = nutrition_db_fingerprint(nutrition_db)
+    if _estimator_cache["db_version"] != db_version:
+        _estimator_cache["model"] = fit_nutrient_estimator(nutrition_db)
+        _estimator_cache["db_version"] = db_version
+    return _estimator_cache["model"]
+
 def get_or_create_nutrition_db(menu_items: List[Dict]) -> Dict:
     """Get nutrition database or create it if doesn't exist"""
     # Try to load existing database
@@ -80,16 +107,14 @@ def get_or_create_nutrition_db(menu_items: List[Dict]) -> Dict:
         # Log the item structure to debug
         print(f"Processing menu item: {item}", file=sys.stderr)
         
-        if (item.get('meal_name') and  # Use get() to avoid KeyError
-            item['meal_name'] != "Closed" and 
-            item['meal_name'] != "No items available" and 
-            item.get('dining_hall') is not None):
+        if is_menu_item(item):
             unique_meals.add(item['meal_name'])
     
     print(f"Found {len(unique_meals)} unique meals to process", file=sys.stderr)
     sys.stderr.flush()
     
     # Get nutrition data for each unique meal
+    not_found = []
     for meal in unique_meals:
         if meal not in nutrition_db:
             nutrients = get_nutrients_from_nutritionix(meal)
@@ -97,13 +122,18 @@ def get_or_create_nutrition_db(menu_items: List[Dict]) -> Dict:
                 nutrition_db[meal] = nutrients
                 time.sleep(0.5)  # Rate limiting
             else:
-                print(f"No nutrients found for {meal}, using defaults", file=sys.stderr)
-                nutrition_db[meal] = {
-                    "calories": 250,
-                    "protein": 8,
-                    "total_carbohydrate": 30,
-                    "total_fat": 10
-                }
+                print(f"No nutrients found for {meal}, estimating", file=sys.stderr)
+                not_found.append(meal)
+    
+    # Estimate the remaining meals in one batch from the ones that were found
+    if not_found:
+        values, confidence = estimate_nutrients(fit_nutrient_estimator(nutrition_db), not_found)
+        for meal, meal_values, meal_confidence in zip(not_found, values, confidence):
+            nutrition_db[meal] = {
+                **{col: round(float(value), 2) for col, value in zip(NUTRIENT_COLUMNS, meal_values)},
+                "estimated": True,
+                "confidence": round(float(meal_confidence), 3)
+            }
     
     # Save database
     try:
@@ -130,16 +160,13 @@ def process_menu_data(menu_items: List[Dict]) -> pd.DataFrame:
         # Log each item being processed
         print(f"Item: {item}", file=sys.stderr)
         
-        if (item.get('meal_name') and  # Use get() to avoid KeyError
-            item['meal_name'] != "Closed" and 
-            item['meal_name'] != "No items available" and 
-            item.get('dining_hall') is not None):
+        if is_menu_item(item):
             rows.append({
                 'dining_hall': item['dining_hall'],
                 'meal_name': item['meal_name']
             })
     
-    df = pd.DataFrame(rows)
+    df = to_menu_frame(rows)
     print(f"\nCreated DataFrame with {len(df)} rows", file=sys.stderr)
     print("Sample of DataFrame:", file=sys.stderr)
     print(df.head(), file=sys.stderr)
@@ -161,20 +188,36 @@ def compute_meal_health(row):
     
     return (norm_calories + norm_protein + norm_carbs + norm_fat) / 4.0
 
-def analyze_meals(menu_items: List[Dict]):
-    """Analyze nutritional content of menu items"""
-    # Get or create nutrition database
-    nutrition_db = get_or_create_nutrition_db(menu_items)
+def compute_meal_health_scores(df: pd.DataFrame) -> np.ndarray:
+    """Vectorized compute_meal_health over every row of a menu frame"""
+    calories = df["calories"].to_numpy(dtype=np.float32)
+    protein = df["protein"].to_numpy(dtype=np.float32)
+    carbs = df["total_carbohydrate"].to_numpy(dtype=np.float32)
+    fat = df["total_fat"].to_numpy(dtype=np.float32)
     
-    # Process menu items
-    df = process_menu_data(menu_items)
-    print(f"Processing {len(df)} meals across {len(df['dining_hall'].unique())} dining halls", file=sys.stderr)
+    norm_calories = np.clip((MAX_CALORIES - calories) / MAX_CALORIES, 0, 1)
+    norm_protein = np.clip(protein / REFERENCE_PROTEIN, 0, 1)
+    norm_carbs = np.clip(1 - (carbs / REFERENCE_CARBS), 0, 1)
+    norm_fat = np.clip(1 - (fat / REFERENCE_FAT), 0, 1)
     
-    # Add nutritional information
-    print("Adding nutritional information to meals...", file=sys.stderr)
-    for idx, row in df.iterrows():
-        meal_name = row['meal_name']
+    return ((norm_calories + norm_protein + norm_carbs + norm_fat) / 4.0).astype(np.float32)
+
+def lookup_nutrients(meal_names: List[str], nutrition_db: Dict,
+                     db_version: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up nutrients for each meal name (exact match, then fuzzy match, then the
+    offline estimator for everything still unmatched, in one batch). db_version
+    identifies the DB for the estimator cache (see get_nutrient_estimator).
+    Returns a float32 array of shape (len(meal_names), len(NUTRIENT_COLUMNS)) and
+    a float32 confidence per name (1 for exact matches, fuzzy ratio / 100 for
+    fuzzy matches, the estimator's confidence otherwise).
+    """
+    nutrients_matrix = np.zeros((len(meal_names), len(NUTRIENT_COLUMNS)), dtype=np.float32)
+    confidence = np.zeros(len(meal_names), dtype=np.float32)
+    unmatched = []
+    for i, meal_name in enumerate(meal_names):
         nutrients = nutrition_db.get(meal_name)
+        match_confidence = 1.0
         
         if not nutrients:
             # Try fuzzy matching
@@ -188,35 +231,61 @@ def analyze_meals(menu_items: List[Dict]):
             
             if best_match:
                 nutrients = nutrition_db[best_match]
+                match_confidence = best_score / 100.0
                 print(f"Matched '{meal_name}' with '{best_match}'", file=sys.stderr)
             else:
-                nutrients = {
-                    "calories": 250,
-                    "protein": 8,
-                    "total_carbohydrate": 30,
-                    "total_fat": 10
-                }
-                print(f"No match found for {meal_name}, using defaults", file=sys.stderr)
+                unmatched.append(i)
+                continue
         
-        df.loc[idx, 'calories'] = nutrients['calories']
-        df.loc[idx, 'protein'] = nutrients['protein']
-        df.loc[idx, 'total_carbohydrate'] = nutrients['total_carbohydrate']
-        df.loc[idx, 'total_fat'] = nutrients['total_fat']
+        nutrients_matrix[i] = nutrient_values(nutrients)
+        confidence[i] = match_confidence * nutrient_confidence(nutrients)
+    
+    if unmatched:
+        print(f"No match found for {len(unmatched)} meals, estimating nutrients", file=sys.stderr)
+        values, estimate_confidence = estimate_nutrients(
+            get_nutrient_estimator(nutrition_db, db_version), [meal_names[i] for i in unmatched]
+        )
+        nutrients_matrix[unmatched] = values
+        confidence[unmatched] = estimate_confidence
+    
+    return nutrients_matrix, confidence
+
+def analyze_meals(menu_items: List[Dict], nutrition_db: Dict = None):
+    """Analyze nutritional content of menu items"""
+    # Get or create nutrition database
+    if nutrition_db is None:
+        nutrition_db = get_or_create_nutrition_db(menu_items)
+    
+    # Process menu items
+    df = process_menu_data(menu_items)
+    print(f"Processing {len(df)} meals across {len(df['dining_hall'].unique())} dining halls", file=sys.stderr)
+    
+    # Add nutritional information. Lookups run once per distinct meal name
+    # (category) and are broadcast to every row through the category codes.
+    print("Adding nutritional information to meals...", file=sys.stderr)
+    category_nutrients, category_confidence = lookup_nutrients(df['meal_name'].cat.categories, nutrition_db)
+    
+    codes = df['meal_name'].cat.codes.to_numpy()
+    for j, col in enumerate(NUTRIENT_COLUMNS):
+        df[col] = category_nutrients[codes, j]
+    df[CONFIDENCE_COLUMN] = category_confidence[codes]
     
     # Compute health scores
     print("Computing health scores...", file=sys.stderr)
-    df['meal_health'] = df.apply(compute_meal_health, axis=1)
+    df['meal_health'] = compute_meal_health_scores(df)
+    df = to_menu_frame(df)
     
     # Log meal counts per dining hall
     print("\nMeal counts per dining hall:", file=sys.stderr)
-    meal_counts = df.groupby('dining_hall').size()
+    meal_counts = df.groupby('dining_hall', observed=True).size()
     for hall, count in meal_counts.items():
         print(f"{hall}: {count} meals", file=sys.stderr)
     
     # Pass full meal data to recommender
+    records = menu_records(df)
     return {
-        'meals_data': df.to_dict(orient='records'),
-        'dining_averages': df.to_dict(orient='records')  # Pass full data instead of averages
+        'meals_data': records,
+        'dining_averages': records  # Pass full data instead of averages
     }
 
 if __name__ == "__main__":
@@ -234,8 +303,17 @@ if __name__ == "__main__":
         print(f"Processing {len(menu_items)} menu items", file=sys.stderr)
         sys.stderr.flush()
         
-        # Analyze meals
-        results = analyze_meals(menu_items)
+        # Analyze meals incrementally: only groups that changed since the saved
+        # snapshot are looked up and scored (imported here because menu_snapshot
+        # itself builds on this module)
+        from menu_snapshot import refresh_menu, snapshot_results, load_snapshot, save_snapshot
+        nutrition_db = get_or_create_nutrition_db(menu_items)
+        snapshot, diff = refresh_menu(menu_items, nutrition_db, load_snapshot())
+        if diff['changed']:
+            save_snapshot(snapshot)
+        else:
+            print("Menu unchanged since last run, reusing snapshot", file=sys.stderr)
+        results = snapshot_results(snapshot, menu_items)
         print("Analysis complete", file=sys.stderr)
         sys.stderr.flush()
         
@@ -0,0 +1,170 @@
+import pandas as pd
+import numpy as np
+from typing import List, Dict, Iterable, Union
+
+#############################
+# Schema
+#############################
+# Identifier columns are stored as categoricals: a menu repeats the same few
+# dining halls and dish names many times, so int codes + one copy of each
+# string is far smaller than one Python str object per row.
+CATEGORY_COLUMNS = ["dining_hall", "meal_name"]
+
+# Nutrients and scores never need more than float32 precision.
+NUTRIENT_COLUMNS = ["calories", "protein", "total_carbohydrate", "total_fat"]
+# How much to trust the nutrients: 1 for exact database matches, lower for fuzzy
+# matches and for values predicted by nutrient_estimator.
+CONFIDENCE_COLUMN = "nutrient_confidence"
+SCORE_COLUMNS = ["meal_health", CONFIDENCE_COLUMN]
+FLOAT_COLUMNS = NUTRIENT_COLUMNS + SCORE_COLUMNS
+
+# Tags from build_nutritionix_db.add_tags packed into a single uint8 bitmask.
+TAG_COLUMN = "tag_flags"
+TAG_FLAGS = {
+    "high-protein": 1 << 0,
+    "low-calorie": 1 << 1,
+    "low-carb": 1 << 2,
+    "vegetarian": 1 << 3,
+    "vegan": 1 << 4,
+    "salad": 1 << 5,
+    "grilled": 1 << 6,
+}
+
+MENU_DTYPES = {
+    **{col: "category" for col in CATEGORY_COLUMNS},
+    **{col: np.float32 for col in FLOAT_COLUMNS},
+    TAG_COLUMN: np.uint8,
+}
+
+# Decimal places kept when converting back to JSON records (float32 carries
+# ~7 significant digits, so this is lossless for realistic nutrient values).
+RECORD_PRECISION = 3
+
+#############################
+# Conversion
+#############################
+def nutrient_values(entry: Dict) -> List[float]:
+    """
+    Nutrient values of a nutrition DB entry in NUTRIENT_COLUMNS order.
+    Missing, null, non-numeric, non-finite or negative values become 0 (the same
+    default get_nutrients_from_nutritionix uses for fields the API omits).
+    """
+    values = []
+    for col in NUTRIENT_COLUMNS:
+        try:
+            value = float(entry.get(col) or 0)
+        except (TypeError, ValueError):
+            value = 0.0
+        values.append(value if np.isfinite(value) and value >= 0 else 0.0)
+    return values
+
+def nutrient_confidence(entry: Dict) -> float:
+    """
+    Confidence stored on a nutrition DB entry, clamped to [0, 1]. Entries without
+    one (API or hand-entered data) and unreadable values count as fully trusted.
+    """
+    try:
+        value = float(entry.get("confidence", 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+    return 1.0 if np.isnan(value) else min(max(value, 0.0), 1.0)
+
+def compute_tag_flags(df: pd.DataFrame) -> np.ndarray:
+    """Compute the uint8 tag bitmask for every row (same rules as add_tags)"""
+    flags = np.zeros(len(df), dtype=np.uint8)
+    if all(col in df.columns for col in NUTRIENT_COLUMNS):
+        flags |= np.where(df["protein"].to_numpy() > 20, TAG_FLAGS["high-protein"], 0).astype(np.uint8)
+        flags |= np.where(df["calories"].to_numpy() < 300, TAG_FLAGS["low-calorie"], 0).astype(np.uint8)
+        flags |= np.where(df["total_carbohydrate"].to_numpy() < 20, TAG_FLAGS["low-carb"], 0).astype(np.uint8)
+
+    # Name-based tags only need evaluating once per distinct dish.
+    names = df["meal_name"].astype("category")
+    categories = names.cat.categories.astype(str).str.lower()
+    name_flags = np.zeros(len(categories), dtype=np.uint8)
+    name_flags |= np.where(categories.str.contains("vegetarian|vegan|tofu"), TAG_FLAGS["vegetarian"], 0).astype(np.uint8)
+    name_flags |= np.where(categories.str.contains("vegan"), TAG_FLAGS["vegan"], 0).astype(np.uint8)
+    name_flags |= np.where(categories.str.contains("salad"), TAG_FLAGS["salad"], 0).astype(np.uint8)
+    name_flags |= np.where(categories.str.contains("grill"), TAG_FLAGS["grilled"], 0).astype(np.uint8)
+    codes = names.cat.codes.to_numpy()
+    flags |= np.where(codes >= 0, name_flags[codes], 0).astype(np.uint8)
+    return flags
+
+def to_menu_frame(data: Union[pd.DataFrame, Dict[str, List], Iterable[Dict]],
+                  required: Iterable[str] = CATEGORY_COLUMNS) -> pd.DataFrame:
+    """
+    Convert menu records, column-oriented data (or an untyped DataFrame) into the
+    compact menu schema.
+    Only the schema columns that are present are converted; tag flags are derived
+    once nutrients and meal names are available. The result is validated (with
+    the given required columns) before being returned.
+    """
+    if isinstance(data, pd.DataFrame):
+        df = data.copy()
+    elif isinstance(data, dict):
+        # Column-oriented JSON (column -> list of values)
+        df = pd.DataFrame(data)
+    else:
+        df = pd.DataFrame(list(data))
+    if df.empty:
+        for col in required:
+            if col in CATEGORY_COLUMNS and col not in df.columns:
+                df[col] = pd.Series(dtype="category")
+    for col, dtype in MENU_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    validate_menu_frame(df, required)
+    if (TAG_COLUMN not in df.columns and "meal_name" in df.columns and
+            all(col in df.columns for col in NUTRIENT_COLUMNS)):
+        df[TAG_COLUMN] = compute_tag_flags(df)
+    return df
+
+def menu_records(df: pd.DataFrame) -> List[Dict]:
+    """Convert a menu frame into JSON-serializable records"""
+    out = df.copy()
+    for col in FLOAT_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype(np.float64).round(RECORD_PRECISION)
+    for col in CATEGORY_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype(object)
+    if TAG_COLUMN in out.columns:
+        out[TAG_COLUMN] = out[TAG_COLUMN].astype(int)
+    return out.to_dict(orient="records")
+
+#############################
+# Validation
+#############################
+def validate_menu_frame(df: pd.DataFrame, required: Iterable[str] = CATEGORY_COLUMNS) -> None:
+    """
+    Check that a menu frame follows the schema.
+    Raises ValueError on missing required columns, wrong dtypes, missing
+    identifiers or negative/non-finite nutrient values.
+    """
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        raise ValueError(f"Menu frame is missing columns: {missing}")
+
+    for col, dtype in MENU_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype == "category":
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                raise ValueError(f"Column '{col}' must be categorical, got {df[col].dtype}")
+            if df[col].isna().any():
+                raise ValueError(f"Column '{col}' contains missing values")
+        elif df[col].dtype != dtype:
+            raise ValueError(f"Column '{col}' must be {np.dtype(dtype).name}, got {df[col].dtype}")
+
+    for col in NUTRIENT_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy()
+            if not np.isfinite(values).all():
+                raise ValueError(f"Column '{col}' contains missing or non-finite values")
+            if (values < 0).any():
+                raise ValueError(f"Column '{col}' contains negative values")
+
+def memory_per_item(df: pd.DataFrame) -> float:
+    """Bytes per menu item as reported by memory_usage(deep=True)"""
+    if len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(deep=True).sum()) / len(df)
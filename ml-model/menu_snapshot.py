@@ -0,0 +1,278 @@
+"""
+Incremental menu refreshes: fingerprint the scraped menu per (dining hall, meal
+period), re-enrich only the items that changed and update per-hall sums in place.
+meals.py __main__ keeps the snapshot in MENU_SNAPSHOT between runs, so a refresh
+of an unchanged menu skips every nutrient lookup and health score.
+"""
+import pandas as pd
+import numpy as np
+import hashlib
+import sys
+import json
+import time
+from pathlib import Path
+from collections import Counter
+from typing import List, Dict, Tuple, Optional
+
+from meals import is_menu_item, lookup_nutrients, compute_meal_health_scores, nutrition_db_fingerprint
+from menu_schema import to_menu_frame, menu_records, NUTRIENT_COLUMNS, CONFIDENCE_COLUMN, RECORD_PRECISION
+from Recommender import AGGREGATE_COLUMNS
+
+#############################
+# Configuration
+#############################
+# Items are grouped per (dining_hall, meal period); the period comes from this
+# key of the scraped item and defaults to "" when the scraper does not send it.
+MEAL_PERIOD_KEY = "meal_type"
+
+# Snapshot file kept between meals.py runs (next to meals.NUTRITIONIX_DB)
+MENU_SNAPSHOT = "menu_snapshot.json"
+
+# Layout of the per-hall sum vectors: item count followed by AGGREGATE_COLUMNS.
+SUM_COLUMNS = ['menu_size'] + AGGREGATE_COLUMNS
+
+#############################
+# Fingerprinting and Diffing
+#############################
+def group_menu_items(menu_items: List[Dict]) -> Dict[Tuple[str, str], Counter]:
+    """Group scraped menu items into meal-name counts per (dining_hall, meal period)"""
+    groups = {}
+    for item in menu_items:
+        if is_menu_item(item):
+            key = (item['dining_hall'], item.get(MEAL_PERIOD_KEY) or "")
+            groups.setdefault(key, Counter())[item['meal_name']] += 1
+    return groups
+
+def fingerprint_group(counts: Counter) -> str:
+    """Order-independent fingerprint of the items served in one group"""
+    digest = hashlib.blake2b(digest_size=16)
+    for meal_name, count in sorted(counts.items()):
+        digest.update(f"{meal_name}\0{count}\n".encode())
+    return digest.hexdigest()
+
+def diff_menu(snapshot: Dict, groups: Dict[Tuple[str, str], Counter]) -> Dict:
+    """
+    Compare freshly grouped menu items against a snapshot.
+    Returns a dict with the changed group keys and, per changed group, the
+    Counters of added and removed meal names.
+    """
+    fingerprints = {key: fingerprint_group(counts) for key, counts in groups.items()}
+    old_fingerprints = snapshot['fingerprints']
+    changed = sorted(
+        key for key in fingerprints.keys() | old_fingerprints.keys()
+        if fingerprints.get(key) != old_fingerprints.get(key)
+    )
+
+    added, removed = {}, {}
+    for key in changed:
+        old = snapshot['groups'].get(key, Counter())
+        new = groups.get(key, Counter())
+        if new - old:
+            added[key] = new - old
+        if old - new:
+            removed[key] = old - new
+
+    return {
+        'changed': changed,
+        'added': added,
+        'removed': removed,
+        'fingerprints': fingerprints
+    }
+
+#############################
+# Snapshot State
+#############################
+def empty_snapshot(db_version: Optional[str] = None) -> Dict:
+    """Create a snapshot for a menu with no items"""
+    return {
+        'db_version': db_version,  # nutrition DB the cached values were looked up in
+        'groups': {},          # (dining_hall, meal period) -> Counter of meal names
+        'fingerprints': {},    # (dining_hall, meal period) -> fingerprint_group()
+        'nutrients': {},       # meal name -> float64 values of AGGREGATE_COLUMNS
+        'confidence': {},      # meal name -> nutrient confidence from lookup_nutrients
+        'hall_sums': {},       # dining hall -> float64 vector laid out as SUM_COLUMNS
+        'hall_aggregates': hall_sums_to_aggregates({})
+    }
+
+def enrich_meal_names(meal_names: List[str], nutrition_db: Dict,
+                      db_version: Optional[str] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, float]]:
+    """Look up nutrients, confidence and health scores for the given meal names"""
+    if not meal_names:
+        return {}, {}
+    nutrients, confidence = lookup_nutrients(meal_names, nutrition_db, db_version)
+    df = pd.DataFrame(nutrients, columns=NUTRIENT_COLUMNS)
+    df['meal_health'] = compute_meal_health_scores(df)
+    # Quantize like menu_records so the sums equal those of the records the
+    # recommender receives from a full meals.analyze_meals run.
+    values = np.round(df[AGGREGATE_COLUMNS].to_numpy(dtype=np.float64), RECORD_PRECISION)
+    values = values.astype(np.float32).astype(np.float64)
+    return dict(zip(meal_names, values)), dict(zip(meal_names, confidence.tolist()))
+
+def hall_sums_to_aggregates(hall_sums: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Build the Recommender.aggregate_dining_halls frame from per-hall sum vectors"""
+    halls = sorted(hall_sums)
+    values = np.array([hall_sums[hall] for hall in halls], dtype=np.float64).reshape(-1, len(SUM_COLUMNS))
+    aggregates = pd.DataFrame(values, index=pd.Index(halls, name='dining_hall', dtype=object),
+                              columns=SUM_COLUMNS)
+    aggregates['menu_size'] = aggregates['menu_size'].round().astype(np.int64)
+    return aggregates
+
+def refresh_menu(menu_items: List[Dict], nutrition_db: Dict,
+                 snapshot: Optional[Dict] = None, db_version: Optional[str] = None) -> Tuple[Dict, Dict]:
+    """
+    Bring a snapshot up to date with a new scrape of the menu.
+    Only groups whose fingerprint changed are diffed; only meal names not in the
+    snapshot's cache are looked up and scored; per-hall sums are adjusted by the delta.
+    Cached values are only valid for the nutrition DB they were looked up in: when
+    db_version (default: nutrition_db_fingerprint(nutrition_db)) differs from the
+    snapshot's, the snapshot is rebuilt from scratch. Callers that track DB changes
+    themselves can pass their own db_version to skip fingerprinting the DB.
+    Returns the new snapshot (the same object when nothing changed) and the diff.
+    The snapshot's 'hall_aggregates' can be passed to
+    Recommender.recommend_from_aggregates.
+    """
+    if db_version is None:
+        db_version = nutrition_db_fingerprint(nutrition_db)
+    if snapshot is None or snapshot['db_version'] != db_version:
+        if snapshot is not None:
+            print("Nutrition database changed, rebuilding menu snapshot", file=sys.stderr)
+        snapshot = empty_snapshot(db_version)
+
+    groups = group_menu_items(menu_items)
+    diff = diff_menu(snapshot, groups)
+    if not diff['changed']:
+        return snapshot, diff
+
+    # Enrich only the meal names that are new to this snapshot
+    nutrients = dict(snapshot['nutrients'])
+    confidence = dict(snapshot['confidence'])
+    new_names = sorted({
+        meal_name for counts in diff['added'].values() for meal_name in counts
+    } - nutrients.keys())
+    print(f"Menu changed in {len(diff['changed'])} groups, enriching {len(new_names)} new meals",
+          file=sys.stderr)
+    new_nutrients, new_confidence = enrich_meal_names(new_names, nutrition_db, db_version)
+    nutrients.update(new_nutrients)
+    confidence.update(new_confidence)
+
+    # Apply the delta to the per-hall sums
+    hall_sums = dict(snapshot['hall_sums'])
+    for sign, delta in ((1.0, diff['added']), (-1.0, diff['removed'])):
+        for (dining_hall, _), counts in delta.items():
+            change = np.zeros(len(SUM_COLUMNS), dtype=np.float64)
+            for meal_name, count in counts.items():
+                change[0] += count
+                change[1:] += count * nutrients[meal_name]
+            hall_sums[dining_hall] = hall_sums.get(dining_hall, 0.0) + sign * change
+    hall_sums = {hall: sums for hall, sums in hall_sums.items() if round(sums[0]) > 0}
+
+    # Drop cached values for meals no longer served anywhere
+    served = {meal_name for counts in groups.values() for meal_name in counts}
+    nutrients = {meal_name: nutrients[meal_name] for meal_name in served}
+    confidence = {meal_name: confidence[meal_name] for meal_name in served}
+
+    new_snapshot = {
+        'db_version': db_version,
+        'groups': groups,
+        'fingerprints': diff['fingerprints'],
+        'nutrients': nutrients,
+        'confidence': confidence,
+        'hall_sums': hall_sums,
+        'hall_aggregates': hall_sums_to_aggregates(hall_sums)
+    }
+    return new_snapshot, diff
+
+def snapshot_frame(snapshot: Dict, menu_items: List[Dict]) -> pd.DataFrame:
+    """
+    Enriched per-item menu frame for the scrape the snapshot was refreshed with,
+    in scrape order (the frame meals.analyze_meals builds, without any lookups)
+    """
+    rows = [(item['dining_hall'], item['meal_name']) for item in menu_items if is_menu_item(item)]
+    df = pd.DataFrame(rows, columns=['dining_hall', 'meal_name'])
+    meal_names = [meal_name for _, meal_name in rows]
+    values = np.array([snapshot['nutrients'][meal_name] for meal_name in meal_names],
+                      dtype=np.float32).reshape(-1, len(AGGREGATE_COLUMNS))
+    for j, col in enumerate(NUTRIENT_COLUMNS):
+        df[col] = values[:, AGGREGATE_COLUMNS.index(col)]
+    df[CONFIDENCE_COLUMN] = np.array([snapshot['confidence'][meal_name] for meal_name in meal_names],
+                                     dtype=np.float32)
+    df['meal_health'] = values[:, AGGREGATE_COLUMNS.index('meal_health')]
+    return to_menu_frame(df)
+
+def snapshot_results(snapshot: Dict, menu_items: List[Dict]) -> Dict:
+    """Same output as meals.analyze_meals, built from a refreshed snapshot"""
+    records = menu_records(snapshot_frame(snapshot, menu_items))
+    return {
+        'meals_data': records,
+        'dining_averages': records  # Pass full data instead of averages
+    }
+
+#############################
+# Persistence
+#############################
+def snapshot_to_json(snapshot: Dict) -> Dict:
+    """Encode a snapshot with JSON-safe keys and values"""
+    return {
+        "db_version": snapshot['db_version'],
+        "sum_columns": SUM_COLUMNS,
+        "groups": [
+            {
+                "dining_hall": dining_hall,
+                "meal_period": meal_period,
+                "fingerprint": snapshot['fingerprints'][(dining_hall, meal_period)],
+                "meals": dict(counts)
+            }
+            for (dining_hall, meal_period), counts in snapshot['groups'].items()
+        ],
+        "nutrients": {meal_name: values.tolist() for meal_name, values in snapshot['nutrients'].items()},
+        "confidence": snapshot['confidence'],
+        "hall_sums": {hall: sums.tolist() for hall, sums in snapshot['hall_sums'].items()},
+        "metadata": {
+            "last_updated": time.strftime("%Y-%m-%d"),
+            "version": "1.0"
+        }
+    }
+
+def snapshot_from_json(data: Dict) -> Optional[Dict]:
+    """Decode snapshot_to_json output; returns None if it was written with another sum layout"""
+    if data.get("sum_columns") != SUM_COLUMNS:
+        return None
+    groups, fingerprints = {}, {}
+    for group in data["groups"]:
+        key = (group["dining_hall"], group["meal_period"])
+        groups[key] = Counter(group["meals"])
+        fingerprints[key] = group["fingerprint"]
+    hall_sums = {hall: np.array(sums, dtype=np.float64) for hall, sums in data["hall_sums"].items()}
+    return {
+        'db_version': data["db_version"],
+        'groups': groups,
+        'fingerprints': fingerprints,
+        'nutrients': {meal_name: np.array(values, dtype=np.float64)
+                      for meal_name, values in data["nutrients"].items()},
+        'confidence': data["confidence"],
+        'hall_sums': hall_sums,
+        'hall_aggregates': hall_sums_to_aggregates(hall_sums)
+    }
+
+def load_snapshot(path: str = MENU_SNAPSHOT) -> Optional[Dict]:
+    """Load a saved snapshot, or None if there is no usable one"""
+    if not Path(path).exists():
+        return None
+    try:
+        with open(path) as f:
+            snapshot = snapshot_from_json(json.load(f))
+        if snapshot is not None:
+            print(f"Loaded menu snapshot with {len(snapshot['groups'])} groups", file=sys.stderr)
+        return snapshot
+    except Exception as e:
+        print(f"Error loading menu snapshot: {e}", file=sys.stderr)
+        return None
+
+def save_snapshot(snapshot: Dict, path: str = MENU_SNAPSHOT) -> None:
+    """Save a snapshot for the next run"""
+    try:
+        with open(path, 'w') as f:
+            json.dump(snapshot_to_json(snapshot), f)
+        print(f"Saved menu snapshot with {len(snapshot['groups'])} groups", file=sys.stderr)
+    except Exception as e:
+        print(f"Error saving menu snapshot: {e}", file=sys.stderr)
@@ -0,0 +1,173 @@
+import numpy as np
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Dict, Tuple, Iterator
+
+from menu_schema import NUTRIENT_COLUMNS, nutrient_values
+
+#############################
+# Configuration
+#############################
+# Size of the hashed feature space for dish-name tokens
+NUM_FEATURES = 2 ** 12
+# Character n-gram length (in addition to whole words)
+NGRAM_SIZE = 3
+# Neighbours averaged for each prediction
+NUM_NEIGHBORS = 5
+# Work budget per query chunk: caps both the (query token, training token) pairs
+# expanded at once and the size of the dense chunk x n_train similarity block
+MAX_PAIRS_PER_CHUNK = 2 ** 18
+
+# Used only when there is nothing to learn from (empty nutrition database)
+DEFAULT_NUTRIENTS = {
+    "calories": 250,
+    "protein": 8,
+    "total_carbohydrate": 30,
+    "total_fat": 10
+}
+
+#############################
+# Features
+#############################
+def name_tokens(meal_name: str) -> List[str]:
+    """Split a dish name into lowercase words and padded character n-grams"""
+    words = re.findall(r"[a-z0-9]+", meal_name.lower())
+    tokens = [f"w:{word}" for word in words]
+    for word in words:
+        padded = f" {word} "
+        tokens.extend(f"c:{padded[i:i + NGRAM_SIZE]}" for i in range(len(padded) - NGRAM_SIZE + 1))
+    return tokens
+
+@lru_cache(maxsize=1 << 16)
+def token_bucket(token: str) -> int:
+    """Feature index of a token (crc32 rather than hash() so it is stable across processes)"""
+    return zlib.crc32(token.encode()) % NUM_FEATURES
+
+def hash_features(meal_names: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hashed token counts for each name as a sparse CSR matrix of shape
+    (len(meal_names), NUM_FEATURES): (indptr, indices, counts).
+    """
+    rows, cols = [], []
+    for row, meal_name in enumerate(meal_names):
+        for token in name_tokens(meal_name):
+            rows.append(row)
+            cols.append(token_bucket(token))
+    keys = np.array(rows, dtype=np.int64) * NUM_FEATURES + np.array(cols, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    indptr = np.zeros(len(meal_names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // NUM_FEATURES, minlength=len(meal_names)), out=indptr[1:])
+    return indptr, (keys % NUM_FEATURES).astype(np.int32), counts.astype(np.float32)
+
+def tfidf_transform(features: Tuple[np.ndarray, np.ndarray, np.ndarray], idf: np.ndarray) -> Tuple:
+    """Apply sublinear TF-IDF weighting and L2-normalize each row of a CSR matrix"""
+    indptr, indices, counts = features
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    data = np.log1p(counts) * idf[indices]
+    norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=len(indptr) - 1))
+    data = (data / np.maximum(norms[rows], 1e-12)).astype(np.float32)
+    return indptr, indices, data
+
+#############################
+# Model
+#############################
+def fit_nutrient_estimator(nutrition_db: Dict) -> Dict:
+    """
+    Fit a nearest-neighbour nutrient estimator on the nutrition database.
+    Entries that were themselves estimated are left out of the training set.
+    Returns a dict of NumPy arrays: idf weights, training features (stored by
+    feature column, i.e. an inverted index) and targets.
+    """
+    names = [name for name, entry in nutrition_db.items() if not entry.get("estimated")]
+    targets = np.array(
+        [nutrient_values(nutrition_db[name]) for name in names], dtype=np.float32
+    ).reshape(-1, len(NUTRIENT_COLUMNS))
+    counts = hash_features(names)
+    doc_freq = np.bincount(counts[1], minlength=NUM_FEATURES)
+    idf = (np.log((1 + len(names)) / (1 + doc_freq)) + 1).astype(np.float32)
+    indptr, indices, data = tfidf_transform(counts, idf)
+
+    # Transpose to column order so queries only touch training rows sharing a token
+    rows = np.repeat(np.arange(len(names), dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    column_ptr = np.zeros(NUM_FEATURES + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=NUM_FEATURES), out=column_ptr[1:])
+
+    fallback = targets.mean(axis=0) if len(names) else \
+        np.array([DEFAULT_NUTRIENTS[col] for col in NUTRIENT_COLUMNS], dtype=np.float32)
+    return {
+        "idf": idf,
+        "column_ptr": column_ptr,
+        "column_rows": rows[order],
+        "column_data": data[order],
+        "targets": targets,
+        "fallback": fallback.astype(np.float32)
+    }
+
+def query_chunks(model: Dict, queries: Tuple) -> Iterator[Tuple[int, int]]:
+    """
+    Split query rows into [start, stop) ranges that stay within MAX_PAIRS_PER_CHUNK.
+    A query's pair count is the number of training nonzeros in its token columns,
+    so names made of common tokens get smaller chunks. A single row over budget
+    still gets a chunk of its own.
+    """
+    indptr, indices, _ = queries
+    num_queries = len(indptr) - 1
+    rows = np.repeat(np.arange(num_queries), np.diff(indptr))
+    row_pairs = np.bincount(rows, weights=np.diff(model["column_ptr"])[indices], minlength=num_queries)
+    cumulative = np.concatenate([[0], np.cumsum(row_pairs)])
+    max_rows = max(1, MAX_PAIRS_PER_CHUNK // max(len(model["targets"]), 1))
+
+    start = 0
+    while start < num_queries:
+        stop = int(np.searchsorted(cumulative, cumulative[start] + MAX_PAIRS_PER_CHUNK, side="right")) - 1
+        stop = min(max(stop, start + 1), start + max_rows, num_queries)
+        yield start, stop
+        start = stop
+
+def similarity_chunk(model: Dict, queries: Tuple, start: int, stop: int) -> np.ndarray:
+    """Cosine similarity of query rows [start, stop) to every training name"""
+    indptr, indices, data = queries
+    lo, hi = indptr[start], indptr[stop]
+    query_rows = np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1]))
+    columns, values = indices[lo:hi], data[lo:hi]
+
+    # Pair every query nonzero with the training nonzeros in the same column
+    first = model["column_ptr"][columns]
+    lengths = model["column_ptr"][columns + 1] - first
+    offsets = np.repeat(first - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    num_train = len(model["targets"])
+    flat = np.repeat(query_rows, lengths) * num_train + model["column_rows"][offsets]
+    weights = np.repeat(values, lengths) * model["column_data"][offsets]
+    return np.bincount(flat, weights=weights, minlength=(stop - start) * num_train) \
+        .reshape(stop - start, num_train).astype(np.float32)
+
+def estimate_nutrients(model: Dict, meal_names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict nutrients for a batch of dish names.
+    Returns (values, confidence): float32 arrays of shape (n, len(NUTRIENT_COLUMNS))
+    and (n,). Confidence is the similarity-weighted mean cosine similarity of the
+    neighbours used (0 when no training name shares a token, in which case the
+    training mean is returned).
+    """
+    values = np.tile(model["fallback"], (len(meal_names), 1))
+    confidence = np.zeros(len(meal_names), dtype=np.float32)
+    num_train = len(model["targets"])
+    if not len(meal_names) or num_train == 0:
+        return values, confidence
+
+    queries = tfidf_transform(hash_features(meal_names), model["idf"])
+    k = min(NUM_NEIGHBORS, num_train)
+    for start, stop in query_chunks(model, queries):
+        similarity = similarity_chunk(model, queries, start, stop)
+        neighbors = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        weights = np.clip(np.take_along_axis(similarity, neighbors, axis=1), 0, None)
+        total = weights.sum(axis=1)
+
+        matched = total > 0
+        weighted = np.einsum("nk,nkc->nc", weights, model["targets"][neighbors])
+        chunk_values = values[start:stop]
+        chunk_values[matched] = weighted[matched] / total[matched, None]
+        confidence[start:stop][matched] = (weights[matched] ** 2).sum(axis=1) / total[matched]
+    return values, confidence
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from build_nutritionix_db import add_tags
+from menu_schema import (to_menu_frame, menu_records, validate_menu_frame, compute_tag_flags,
+                         TAG_FLAGS, TAG_COLUMN)
+from Recommender import recommend_dining_hall
+
+RECORDS = [
+    {"dining_hall": "John Jay", "meal_name": "Grilled Chicken Salad", "calories": 350.0,
+     "protein": 30.0, "total_carbohydrate": 12.0, "total_fat": 14.0, "meal_health": 0.772},
+    {"dining_hall": "Ferris", "meal_name": "Beef Burger", "calories": 750.0,
+     "protein": 35.0, "total_carbohydrate": 45.0, "total_fat": 42.0, "meal_health": 0.575},
+]
+
+# Per-hall rows as documented for DINING_HALLS_CSV in Recommender.py
+HALL_ROWS = {
+    "dining_hall": ["Dining Hall A", "Dining Hall B"],
+    "calories": [450, 600],
+    "protein": [30, 25],
+    "total_carbohydrate": [15, 50],
+    "total_fat": [10, 35],
+    "meal_health": [0.85, 0.70],
+}
+
+def test_validate_rejects_missing_column():
+    df = to_menu_frame(RECORDS).drop(columns=["meal_name"])
+    with pytest.raises(ValueError, match="missing columns"):
+        validate_menu_frame(df)
+
+def test_validate_rejects_wrong_dtype():
+    df = to_menu_frame(RECORDS)
+    df["calories"] = df["calories"].astype(np.float64)
+    with pytest.raises(ValueError, match="must be float32"):
+        validate_menu_frame(df)
+
+    df = to_menu_frame(RECORDS)
+    df["dining_hall"] = df["dining_hall"].astype(object)
+    with pytest.raises(ValueError, match="must be categorical"):
+        validate_menu_frame(df)
+
+def test_validate_rejects_nan_and_negative_values():
+    records = [dict(RECORDS[0], protein=None)]
+    with pytest.raises(ValueError, match="non-finite"):
+        to_menu_frame(records)
+
+    records = [dict(RECORDS[0], total_fat=-1.0)]
+    with pytest.raises(ValueError, match="negative"):
+        to_menu_frame(records)
+
+    records = [dict(RECORDS[0], dining_hall=None)]
+    with pytest.raises(ValueError, match="missing values"):
+        to_menu_frame(records)
+
+@pytest.mark.parametrize("meal_name, nutrients", [
+    ("Grilled Chicken", {"calories": 250, "protein": 25, "total_carbohydrate": 5}),
+    ("Vegan Tofu Bowl", {"calories": 450, "protein": 15, "total_carbohydrate": 60}),
+    ("Vegetarian Chili", {"calories": 320, "protein": 21, "total_carbohydrate": 19}),
+    ("Caesar Salad", {"calories": 180, "protein": 8, "total_carbohydrate": 25}),
+    ("Beef Burger", {"calories": 750, "protein": 35, "total_carbohydrate": 45}),
+])
+def test_tag_flags_match_add_tags(meal_name, nutrients):
+    tags = add_tags(dict(nutrients), meal_name, None, None)["tags"]
+    expected = 0
+    for tag in tags:
+        expected |= TAG_FLAGS[tag]
+
+    df = pd.DataFrame([dict(nutrients, meal_name=meal_name, total_fat=10)])
+    assert compute_tag_flags(df)[0] == expected
+
+def test_records_round_trip():
+    df = to_menu_frame(RECORDS)
+    assert df[TAG_COLUMN].dtype == np.uint8
+    records = menu_records(df)
+    assert [{k: v for k, v in r.items() if k != TAG_COLUMN} for r in records] == RECORDS
+    assert menu_records(to_menu_frame(records)) == records
+
+def test_column_oriented_input():
+    columns = {key: [record[key] for record in RECORDS] for key in RECORDS[0]}
+    assert menu_records(to_menu_frame(columns)) == menu_records(to_menu_frame(RECORDS))
+
+def test_per_hall_rows_are_accepted_by_recommender():
+    for data in (HALL_ROWS, pd.DataFrame(HALL_ROWS).to_dict(orient="records")):
+        df = to_menu_frame(data, required=["dining_hall"])
+        assert TAG_COLUMN not in df.columns
+        recommendations = recommend_dining_hall(df)
+        assert [r["dining_hall"] for r in recommendations] == ["Dining Hall A", "Dining Hall B"]
+        assert recommendations[0]["insights"]["avg_macros"]["calories"] == 450.0
+
+def test_per_hall_rows_without_dining_hall_are_rejected():
+    rows = {key: values for key, values in HALL_ROWS.items() if key != "dining_hall"}
+    with pytest.raises(ValueError, match="missing columns"):
+        to_menu_frame(rows, required=["dining_hall"])
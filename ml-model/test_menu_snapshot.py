@@ -0,0 +1,161 @@
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+from meals import analyze_meals, NUTRITIONIX_DB
+from menu_schema import to_menu_frame
+from menu_snapshot import (refresh_menu, snapshot_results, save_snapshot, load_snapshot,
+                           MEAL_PERIOD_KEY, MENU_SNAPSHOT)
+from Recommender import recommend_dining_hall, recommend_from_aggregates
+
+NUTRITION_DB = {
+    "Grilled Chicken Salad": {"calories": 350, "protein": 30, "total_carbohydrate": 12, "total_fat": 14},
+    "Beef Burger": {"calories": 750, "protein": 35, "total_carbohydrate": 45, "total_fat": 42},
+    "Veggie Wrap": {"calories": 420, "protein": 12, "total_carbohydrate": 55, "total_fat": 15},
+    "Chicken Rice": {"calories": 500, "protein": 30, "total_carbohydrate": 50, "total_fat": 15},
+}
+
+def item(dining_hall, meal_name, meal_period="lunch"):
+    return {"dining_hall": dining_hall, "meal_name": meal_name, MEAL_PERIOD_KEY: meal_period}
+
+def full_recompute(menu_items, nutrition_db):
+    """Recommendations from a full meals.analyze_meals -> Recommender run"""
+    results = analyze_meals(menu_items, nutrition_db)
+    return recommend_dining_hall(to_menu_frame(results['dining_averages']))
+
+def assert_matches_full_recompute(snapshot, menu_items, nutrition_db):
+    assert recommend_from_aggregates(snapshot['hall_aggregates']) == full_recompute(menu_items, nutrition_db)
+
+def test_incremental_matches_full_recompute_after_changes():
+    db = dict(NUTRITION_DB)
+    menu = [item("A", "Beef Burger"), item("A", "Veggie Wrap"), item("B", "Grilled Chicken Salad")]
+    snapshot, _ = refresh_menu(menu, db)
+    assert_matches_full_recompute(snapshot, menu, db)
+
+    menu = menu + [item("B", "Beef Burger", "dinner"), item("C", "Mystery Stew")]
+    snapshot, diff = refresh_menu(menu, db, snapshot)
+    assert sorted(diff['changed']) == [("B", "dinner"), ("C", "lunch")]
+    assert_matches_full_recompute(snapshot, menu, db)
+
+def test_removed_hall_is_dropped():
+    db = dict(NUTRITION_DB)
+    menu = [item("A", "Beef Burger"), item("B", "Veggie Wrap"), item("B", "Chicken Rice", "dinner")]
+    snapshot, _ = refresh_menu(menu, db)
+
+    menu = [item("A", "Beef Burger")]
+    snapshot, diff = refresh_menu(menu, db, snapshot)
+    assert list(snapshot['hall_aggregates'].index) == ["A"]
+    assert set(diff['removed']) == {("B", "lunch"), ("B", "dinner")}
+    assert_matches_full_recompute(snapshot, menu, db)
+
+def test_empty_scrape():
+    db = dict(NUTRITION_DB)
+    snapshot, _ = refresh_menu([item("A", "Beef Burger")], db)
+
+    snapshot, _ = refresh_menu([item("A", "Closed")], db, snapshot)
+    assert snapshot['hall_aggregates'].empty
+    assert snapshot['nutrients'] == {}
+    assert recommend_from_aggregates(snapshot['hall_aggregates']) == []
+
+def test_unchanged_menu_returns_same_snapshot():
+    db = dict(NUTRITION_DB)
+    menu = [item("A", "Beef Burger"), item("B", "Veggie Wrap")]
+    snapshot, _ = refresh_menu(menu, db)
+
+    refreshed, diff = refresh_menu(list(reversed(menu)), db, snapshot)
+    assert refreshed is snapshot
+    assert diff['changed'] == []
+
+def test_nutrition_db_change_rebuilds_snapshot():
+    db = dict(NUTRITION_DB)
+    menu = [item("A", "Beef Rice"), item("B", "Chicken Rice")]
+    snapshot, _ = refresh_menu(menu, db)
+
+    # The DB gains a real entry for a meal that was previously matched/estimated
+    db["Beef Rice"] = {"calories": 900, "protein": 40, "total_carbohydrate": 60, "total_fat": 40}
+    refreshed, _ = refresh_menu(menu, db, snapshot)
+    assert refreshed is not snapshot
+    assert_matches_full_recompute(refreshed, menu, db)
+
+    menu = menu + [item("A", "Chicken Rice")]
+    refreshed, _ = refresh_menu(menu, db, refreshed)
+    assert_matches_full_recompute(refreshed, menu, db)
+
+def test_cache_only_holds_served_meals():
+    db = dict(NUTRITION_DB)
+    snapshot, _ = refresh_menu([item("A", "Beef Burger"), item("A", "Veggie Wrap")], db)
+
+    snapshot, _ = refresh_menu([item("A", "Beef Burger")], db, snapshot)
+    assert set(snapshot['nutrients']) == {"Beef Burger"}
+    assert set(snapshot['confidence']) == {"Beef Burger"}
+
+def test_many_add_remove_cycles():
+    rng = random.Random(0)
+    db = dict(NUTRITION_DB)
+    dishes = list(NUTRITION_DB) + ["Mystery Stew", "Tofu Curry"]
+    halls = ["A", "B", "C"]
+    periods = ["breakfast", "lunch", "dinner"]
+
+    snapshot = None
+    menu = []
+    for _ in range(30):
+        if menu and rng.random() < 0.4:
+            for _ in range(rng.randint(1, len(menu))):
+                menu.pop(rng.randrange(len(menu)))
+        for _ in range(rng.randint(0, 4)):
+            menu.append(item(rng.choice(halls), rng.choice(dishes), rng.choice(periods)))
+        snapshot, _ = refresh_menu(menu, db, snapshot)
+        if menu:
+            assert_matches_full_recompute(snapshot, menu, db)
+        else:
+            assert snapshot['hall_aggregates'].empty
+
+def test_snapshot_results_match_analyze_meals():
+    db = dict(NUTRITION_DB)
+    menu = [item("B", "Beef Burger"), item("A", "Mystery Stew"), item("A", "Closed"),
+            item("B", "Veggie Wraps", "dinner"), item("A", "Beef Burger")]
+    snapshot, _ = refresh_menu(menu, db)
+    assert snapshot_results(snapshot, menu) == analyze_meals(menu, db)
+
+def test_saved_snapshot_round_trip(tmp_path):
+    db = dict(NUTRITION_DB)
+    menu = [item("A", "Beef Burger"), item("B", "Mystery Stew", "dinner")]
+    snapshot, _ = refresh_menu(menu, db)
+    path = str(tmp_path / MENU_SNAPSHOT)
+    save_snapshot(snapshot, path)
+
+    loaded = load_snapshot(path)
+    assert loaded['hall_aggregates'].equals(snapshot['hall_aggregates'])
+    refreshed, diff = refresh_menu(menu, db, loaded)
+    assert refreshed is loaded and diff['changed'] == []
+    assert snapshot_results(refreshed, menu) == snapshot_results(snapshot, menu)
+
+    menu = menu + [item("A", "Veggie Wrap")]
+    refreshed, _ = refresh_menu(menu, db, loaded)
+    assert_matches_full_recompute(refreshed, menu, db)
+
+def test_unusable_snapshot_file_is_ignored(tmp_path):
+    path = tmp_path / MENU_SNAPSHOT
+    assert load_snapshot(str(path)) is None
+    path.write_text("{not json")
+    assert load_snapshot(str(path)) is None
+
+def test_meals_cli_reuses_saved_snapshot(tmp_path):
+    with open(tmp_path / NUTRITIONIX_DB, "w") as f:
+        json.dump({"meals": NUTRITION_DB}, f)
+    menu = json.dumps([item("A", "Beef Burger"), item("B", "Mystery Stew", "dinner")])
+    script = str(Path(__file__).with_name("meals.py"))
+
+    def run():
+        return subprocess.run([sys.executable, script], input=menu, capture_output=True,
+                              text=True, cwd=tmp_path, check=True)
+
+    first = run()
+    assert (tmp_path / MENU_SNAPSHOT).exists()
+    second = run()
+    assert "Menu unchanged since last run" in second.stderr
+    assert "Looking up" not in second.stderr
+    assert json.loads(second.stdout) == json.loads(first.stdout)
+    assert json.loads(first.stdout) == analyze_meals(json.loads(menu), dict(NUTRITION_DB))
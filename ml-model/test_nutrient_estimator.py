@@ -0,0 +1,92 @@
+import numpy as np
+
+import meals
+import nutrient_estimator
+from meals import lookup_nutrients
+from menu_schema import to_menu_frame, nutrient_values, nutrient_confidence
+from nutrient_estimator import fit_nutrient_estimator, estimate_nutrients, hash_features, tfidf_transform, query_chunks
+
+NUTRITION_DB = {
+    "Grilled Chicken Salad": {"calories": 350, "protein": 30, "total_carbohydrate": 12, "total_fat": 14},
+    "Grilled Chicken Wrap": {"calories": 450, "protein": 28, "total_carbohydrate": 40, "total_fat": 16},
+    "Beef Burger": {"calories": 750, "protein": 35, "total_carbohydrate": 45, "total_fat": 42},
+    "Veggie Wrap": {"calories": 420, "protein": 12, "total_carbohydrate": 55, "total_fat": 15},
+}
+
+def test_estimates_unknown_names_from_similar_dishes():
+    model = fit_nutrient_estimator(NUTRITION_DB)
+    values, confidence = estimate_nutrients(model, ["Grilled Chicken Bowl", "Zzyzx"])
+
+    # Shares tokens with the grilled chicken dishes only
+    assert 350 <= values[0, 0] <= 450
+    assert confidence[0] > 0
+    # No shared tokens: training mean with zero confidence
+    assert np.allclose(values[1], model["fallback"])
+    assert confidence[1] == 0
+
+def test_estimated_entries_are_not_training_data():
+    db = dict(NUTRITION_DB)
+    db["Mystery Stew"] = {"calories": 5000, "protein": 0, "total_carbohydrate": 0, "total_fat": 0,
+                          "estimated": True, "confidence": 0.0}
+    model = fit_nutrient_estimator(db)
+    assert len(model["targets"]) == len(NUTRITION_DB)
+
+def test_incomplete_entries_are_normalized_the_same_way_in_both_paths():
+    db = dict(NUTRITION_DB)
+    db["Plain Rice"] = {"calories": 200, "protein": None, "total_carbohydrate": 45}
+    assert nutrient_values(db["Plain Rice"]) == [200.0, 0.0, 45.0, 0.0]
+
+    values, _ = lookup_nutrients(["Plain Rice"], db)
+    assert values[0].tolist() == nutrient_values(db["Plain Rice"])
+
+    model = fit_nutrient_estimator(db)
+    assert model["targets"][-1].tolist() == nutrient_values(db["Plain Rice"])
+
+    results = meals.analyze_meals([{"dining_hall": "A", "meal_name": "Plain Rice"}], db)
+    to_menu_frame(results["meals_data"])
+
+def test_estimator_is_fitted_once_per_db_version(monkeypatch):
+    fits = []
+    def counting_fit(nutrition_db):
+        fits.append(1)
+        return fit_nutrient_estimator(nutrition_db)
+    monkeypatch.setattr(meals, "fit_nutrient_estimator", counting_fit)
+    monkeypatch.setattr(meals, "_estimator_cache", {"db_version": None, "model": None})
+
+    db = dict(NUTRITION_DB)
+    lookup_nutrients(["Zzyzx Soup"], db)
+    lookup_nutrients(["Qwerty Pie"], db)
+    assert len(fits) == 1
+
+    db["Tofu Curry"] = {"calories": 400, "protein": 18, "total_carbohydrate": 40, "total_fat": 16}
+    lookup_nutrients(["Zzyzx Soup"], db)
+    assert len(fits) == 2
+
+def test_query_chunks_respect_pair_budget(monkeypatch):
+    model = fit_nutrient_estimator(NUTRITION_DB)
+    names = ["Grilled Chicken Bowl", "Zzyzx", "Beef Wrap", "Veggie Burger", "Chicken Salad Wrap"] * 3
+    expected = estimate_nutrients(model, names)
+
+    monkeypatch.setattr(nutrient_estimator, "MAX_PAIRS_PER_CHUNK", 40)
+    queries = tfidf_transform(hash_features(names), model["idf"])
+    chunks = list(query_chunks(model, queries))
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(names)
+    assert all(stop == next_start for (_, stop), (next_start, _) in zip(chunks, chunks[1:]))
+    assert len(chunks) > 1
+
+    values, confidence = estimate_nutrients(model, names)
+    assert np.array_equal(values, expected[0])
+    assert np.array_equal(confidence, expected[1])
+
+def test_stored_confidence_is_normalized():
+    assert nutrient_confidence({}) == 1.0
+    for raw, expected in ((None, 1.0), ("high", 1.0), ("0.25", 0.25), (float("nan"), 1.0),
+                          (-0.5, 0.0), (3, 1.0), (0.4, 0.4)):
+        assert nutrient_confidence({"confidence": raw}) == expected
+
+    db = {name: dict(entry, confidence=raw) for (name, entry), raw
+          in zip(NUTRITION_DB.items(), (None, "bad", 7, -1))}
+    _, confidence = lookup_nutrients(list(db), db)
+    assert confidence.tolist() == [1.0, 1.0, 1.0, 0.0]
+    results = meals.analyze_meals([{"dining_hall": "A", "meal_name": name} for name in db], db)
+    to_menu_frame(results["meals_data"])